@@ -18,27 +18,41 @@
 # You should have received a copy of the GNU General Public License
 # along with metricq-source-bacnet.  If not, see <http://www.gnu.org/licenses/>.
 import json
-from typing import Tuple
+from typing import Any, Dict, Iterable, Tuple
 
 import click
 
 def _cachekey_str_to_tuple(cache_key_str: str) -> Tuple[str, str, int]:
-    device_address_str, object_type, object_instance = cache_key_str.split("-*-", 3)
+    rest, _, object_instance = cache_key_str.rpartition("-*-")
+    device_address_str, _, object_type = rest.rpartition("-*-")
     return device_address_str, object_type, int(object_instance)
 
+
+def _cache_entries(cache_file) -> Iterable[Tuple[Any, Dict]]:
+    disk_cache = json.load(cache_file)
+    if isinstance(disk_cache, dict):
+        # old format with "address-*-type-*-instance" string keys
+        return disk_cache.items()
+
+    return disk_cache
+
+
+def _cache_key_to_tuple(cache_key) -> Tuple[str, str, int]:
+    if isinstance(cache_key, str):
+        return _cachekey_str_to_tuple(cache_key)
+
+    return tuple(cache_key)
+
+
 @click.command()
 @click.option("--cache-file", type=click.File("r"), required=True)
 @click.argument("search-string")
 def main(cache_file, search_string):
-    object_info_cache = {
-        _cachekey_str_to_tuple(key): value
-        for key, value in json.load(cache_file).items()
-    }
-
-    for cache_entry in object_info_cache:
-        object_name = object_info_cache[cache_entry].get("objectName")
+    for cache_key, object_info in _cache_entries(cache_file):
+        object_name = object_info.get("objectName")
         if object_name and search_string in object_name:
-            click.echo(f"{cache_entry}: {object_info_cache[cache_entry]}")
+            # only parse the keys of matching entries
+            click.echo(f"{_cache_key_to_tuple(cache_key)}: {object_info}")
 
 
 if __name__ == "__main__":
@@ -26,27 +26,23 @@ import click
 @click.command()
 @click.argument("ede-file", type=click.File("r"))
 def main(ede_file):
-    ede_reader = csv.reader(ede_file, delimiter=";")
-
-    header_compeleted = False
-    vendor_specific_address_column = -1
-    object_name_column = -1
     vendor_specific_address_mapping = {}
+    ede_reader = csv.reader(ede_file, delimiter=";")
 
+    header = None
     for ede_row in ede_reader:
-        if len(ede_row) > 0:
-            if not header_compeleted:
-                if ede_row[0].startswith("#") and "keyname" in ede_row[0]:
-                    header_compeleted = True
-                    vendor_specific_address_column = ede_row.index(
-                        "vendor-specific-address"
-                    )
-                    object_name_column = ede_row.index("object-name")
-            else:
-                if ede_row[vendor_specific_address_column].strip():
-                    vendor_specific_address_mapping[
-                        ede_row[object_name_column]
-                    ] = ede_row[vendor_specific_address_column]
+        if ede_row and ede_row[0].startswith("#") and "keyname" in ede_row[0]:
+            header = ede_row
+            break
+
+    if header is not None:
+        # the reader stopped after the header, continue with the data rows
+        for ede_row in csv.DictReader(ede_file, fieldnames=header, delimiter=";"):
+            vendor_specific_address = ede_row["vendor-specific-address"]
+            if vendor_specific_address and vendor_specific_address.strip():
+                vendor_specific_address_mapping[
+                    ede_row["object-name"]
+                ] = vendor_specific_address
 
     click.echo(json.dumps(vendor_specific_address_mapping))
 
@@ -17,11 +17,16 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with metricq-source-bacnet.  If not, see <http://www.gnu.org/licenses/>.
+import asyncio
 import json
+import os
+import sys
 import threading
-import time
-from threading import RLock, Thread
-from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Union
+from collections import deque
+from functools import lru_cache
+from itertools import islice
+from threading import Lock, Thread
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple, Union
 
 from bacpypes.apdu import (
     ReadAccessResult,
@@ -49,21 +54,138 @@ from metricq_source_bacnet.bacnet_utils import BetterDeviceInfoCache
 
 logger = get_logger(__name__)
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def _cachekey_tuple_to_str(cache_key_tuple: Tuple[str, str, int]) -> str:
-    return "{}-*-{}-*-{}".format(*cache_key_tuple)
+_DEFAULT_DEVICE_PROPERTIES = ("objectName", "description")
+_DEFAULT_OBJECT_PROPERTIES = ("objectName", "description", "units")
+
+# estimated encoded sizes in a ReadPropertyMultiple-ACK, used to fit unsegmented
+# presentValue responses into the maximum APDU length of a device. A result is at
+# most an object identifier, a property identifier, the context tags and either a
+# value of the analog, binary or multi-state objects we poll or an error.
+_APDU_OVERHEAD = 32
+_PRESENT_VALUE_RESULT_SIZE = 32
+
+_property_labels: Dict[Any, str] = {}
 
 
 def _cachekey_str_to_tuple(cache_key_str: str) -> Tuple[str, str, int]:
-    device_address_str, object_type, object_instance = cache_key_str.split("-*-", 3)
+    rest, _, object_instance = cache_key_str.rpartition("-*-")
+    device_address_str, _, object_type = rest.rpartition("-*-")
     return device_address_str, object_type, int(object_instance)
 
 
-# from https://stackoverflow.com/a/312464
-def chunks(lst, n):
-    """Yield successive n-sized chunks from lst."""
-    for i in range(0, len(lst), n):
-        yield lst[i : i + n]
+def _load_object_info_cache(disk_cache_filename) -> Dict[Tuple[str, str, int], Dict]:
+    with open(disk_cache_filename, "rb") as disk_cache_file:
+        raw_disk_cache = disk_cache_file.read()
+
+    if orjson:
+        disk_cache = orjson.loads(raw_disk_cache)
+    else:
+        disk_cache = json.loads(raw_disk_cache)
+
+    if isinstance(disk_cache, dict):
+        # old format with "address-*-type-*-instance" string keys
+        return {_cachekey_str_to_tuple(key): value for key, value in disk_cache.items()}
+
+    return {tuple(key): value for key, value in disk_cache}
+
+
+def _dump_object_info_cache(
+    object_info_cache: Dict[Tuple[str, str, int], Dict], disk_cache_filename
+):
+    # store as list of [key, value] pairs, so keys keep their types
+    object_info_items = list(object_info_cache.items())
+    if orjson:
+        raw_disk_cache = orjson.dumps(object_info_items, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        raw_disk_cache = json.dumps(object_info_items).encode()
+
+    # write to a temporary file first, so a crash doesn't leave a broken cache
+    tmp_disk_cache_filename = f"{disk_cache_filename}.tmp"
+    with open(tmp_disk_cache_filename, "wb") as disk_cache_file:
+        disk_cache_file.write(raw_disk_cache)
+    os.replace(tmp_disk_cache_filename, disk_cache_filename)
+
+
+@lru_cache(maxsize=1024)
+def _address(device_address_str: str) -> Address:
+    # parsing addresses is expensive and the set of devices is small and fixed
+    return Address(device_address_str)
+
+
+@lru_cache(maxsize=128)
+def _property_references(properties: Tuple[str, ...]) -> List[PropertyReference]:
+    # the returned list is shared between requests, don't modify it!
+    return [PropertyReference(propertyIdentifier=property) for property in properties]
+
+
+@lru_cache(maxsize=4096)
+def _resolve_datatype(
+    object_type, property_identifier
+) -> Tuple[Optional[type], bool, bool]:
+    """Find the datatype of a property and whether it is an array or an enumeration.
+
+    Extended object types have to be registered before the first call.
+    """
+    datatype = get_datatype(object_type, property_identifier)
+    if datatype is None:
+        return None, False, False
+    return datatype, issubclass(datatype, Array), issubclass(datatype, Enumerated)
+
+
+def _property_label(property_identifier) -> str:
+    # only a few dozen property identifiers exist, so reuse interned labels
+    property_label = _property_labels.get(property_identifier)
+    if property_label is None:
+        property_label = sys.intern(str(property_identifier))
+        _property_labels[property_identifier] = property_label
+    return property_label
+
+
+@lru_cache(maxsize=16384)
+def _read_access_specification(
+    object_identifier: Tuple[Union[str, int], int], properties: Tuple[str, ...]
+) -> ReadAccessSpecification:
+    # the returned specification is shared between requests, don't modify it!
+    return ReadAccessSpecification(
+        objectIdentifier=ObjectIdentifier(object_identifier),
+        listOfPropertyReferences=_property_references(properties),
+    )
+
+
+@lru_cache(maxsize=1024)
+def _read_access_specification_chunks(
+    objects: Tuple[Tuple[Union[str, int], int], ...],
+    properties: Tuple[str, ...],
+    chunk_size: int,
+) -> List[List[ReadAccessSpecification]]:
+    # the returned lists are shared between requests, don't modify them!
+    return [
+        [
+            _read_access_specification(object_identifier, properties)
+            for object_identifier in objects_chunk
+        ]
+        for objects_chunk in chunks(objects, chunk_size)
+    ]
+
+
+def _set_future_result(future: asyncio.Future, result):
+    # the waiting task may have been cancelled in the meantime
+    if not future.done():
+        future.set_result(result)
+
+
+def chunks(iterable, n):
+    """Yield successive n-sized chunks from iterable."""
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, n))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, n))
 
 
 class BACnetMetricQReader(BIPSimpleApplication):
@@ -74,6 +196,8 @@ class BACnetMetricQReader(BIPSimpleApplication):
         put_result_in_source_queue_fn: Callable[[str, str, Dict], None],
         disk_cache_filename=None,
         retry_count=10,
+        max_inflight_requests=64,
+        batch_wait: Optional[Timedelta] = None,
     ):
         self._thread = Thread(target=bacnet_run)
         # MetricQ Bacnet Run Thread
@@ -87,24 +211,60 @@ class BACnetMetricQReader(BIPSimpleApplication):
         #  key is (device address, object type, object instance)
         #  value is dict of property name and value
         self._disk_cache_filename = disk_cache_filename
-        self._object_info_cache_lock = RLock()
+        self._object_info_cache_lock = Lock()
         with self._object_info_cache_lock:
             self._object_info_cache: Dict[Tuple[str, str, int], Dict[str, Any]] = {}
             if disk_cache_filename:
                 try:
-                    with open(disk_cache_filename) as disk_cache_file:
-                        self._object_info_cache = {
-                            _cachekey_str_to_tuple(key): value
-                            for key, value in json.load(disk_cache_file).items()
-                        }
-                except (OSError, json.decoder.JSONDecodeError):
+                    self._object_info_cache = _load_object_info_cache(
+                        disk_cache_filename
+                    )
+                except (OSError, ValueError):
                     logger.warning(
                         "Can't read disk cache file. Starting with empty cache!",
                         exc_info=True,
                     )
 
+            # object names by cache key, the callback only needs the name of an object
+            self._object_names: Dict[Tuple[str, str, int], str] = {
+                cache_key: object_info["objectName"]
+                for cache_key, object_info in self._object_info_cache.items()
+                if object_info.get("objectName")
+            }
+
         self._retry_count = retry_count
 
+        # event loop of the source, the request coroutines have to run in this loop
+        self._event_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # futures for request_device_properties waiting for an I-Am of a device
+        self._i_am_futures: Dict[Address, asyncio.Future] = {}
+
+        # requests collected in the event loop, handed to BACpypes once per loop tick
+        self._queued_iocbs: List[IOCB] = []
+
+        # address string and device identifier by address for the value callback,
+        # only used from the BACpypes thread
+        self._device_keys: Dict[Address, Tuple[str, int]] = {}
+
+        # number of unfinished value requests per device, to not overwhelm devices
+        self._max_inflight_requests = max_inflight_requests
+        self._inflight_requests_lock = Lock()
+        self._inflight_requests: Dict[str, int] = {}
+
+        # value requests are collected per device for batch_wait and then sent together
+        self._batch_wait = batch_wait
+        self._pending_value_requests: Dict[
+            str,
+            List[
+                Tuple[
+                    Sequence[Tuple[Union[int, str], int]],
+                    Optional[int],
+                    Optional[Timedelta],
+                ]
+            ],
+        ] = {}
+
         local_device_object = LocalDeviceObject(
             objectName="MetricQReader",
             objectIdentifier=reader_object_identifier,
@@ -121,6 +281,7 @@ class BACnetMetricQReader(BIPSimpleApplication):
         )
 
     def start(self):
+        self._event_loop = asyncio.get_event_loop()
         self._thread.start()
 
     def stop(self):
@@ -133,14 +294,9 @@ class BACnetMetricQReader(BIPSimpleApplication):
 
         if self._disk_cache_filename:
             try:
-                with open(self._disk_cache_filename, "w") as disk_cache_file:
-                    json.dump(
-                        {
-                            _cachekey_tuple_to_str(key): value
-                            for key, value in self._object_info_cache.items()
-                        },
-                        disk_cache_file,
-                    )
+                _dump_object_info_cache(
+                    self._object_info_cache, self._disk_cache_filename
+                )
             except OSError:
                 logger.warning("Can't write disk cache file!", exc_info=True)
 
@@ -160,119 +316,181 @@ class BACnetMetricQReader(BIPSimpleApplication):
         if not isinstance(apdu, ReadPropertyMultipleACK):
             return None
 
-        apdu: ReadPropertyMultipleACK
-
         # loop through the results
         result_values: Dict[Tuple[Union[str, int], int], Dict[str, Any]] = {}
 
         result: ReadAccessResult
         for result in apdu.listOfReadAccessResults:
             object_identifier: Tuple[Union[str, int], int] = result.objectIdentifier
-            object_type, object_instance = object_identifier
 
-            results_for_object = result_values.get(object_identifier, {})
+            self._unpack_read_access_result(
+                apdu,
+                result,
+                result_values.setdefault(object_identifier, {}),
+                enum_to_int=enum_to_int,
+            )
 
-            # now come the property values per object
-            element: ReadAccessResultElement
-            for element in result.listOfResults:
-                # get the property and array index
-                property_identifier: PropertyIdentifier = element.propertyIdentifier
-                property_label = str(property_identifier)
+        return result_values
+
+    def _unpack_read_access_result(
+        self,
+        apdu: ReadPropertyMultipleACK,
+        result: ReadAccessResult,
+        results_for_object: Dict[str, Any],
+        enum_to_int: bool = False,
+    ):
+        object_identifier: Tuple[Union[str, int], int] = result.objectIdentifier
+        object_type, object_instance = object_identifier
+
+        # now come the property values per object
+        element: ReadAccessResultElement
+        for element in result.listOfResults:
+            # get the property and array index
+            property_identifier: PropertyIdentifier = element.propertyIdentifier
+            property_label = _property_label(property_identifier)
+
+            property_array_index: int = element.propertyArrayIndex
 
-                property_array_index: int = element.propertyArrayIndex
+            # here is the read result
+            read_result: ReadAccessResultElementChoice = element.readResult
 
-                # here is the read result
+            # check for an error
+            if read_result.propertyAccessError is not None:
+                if property_array_index is not None:
+                    property_label = f"{property_label}[{property_array_index}]"
+                logger.error(
+                    "Error reading property {} for object {} from device {}: {} ({})",
+                    property_label,
+                    object_identifier,
+                    apdu.pduSource,
+                    read_result.propertyAccessError.errorClass,
+                    read_result.propertyAccessError.errorCode,
+                )
+
+            else:
+                # here is the value
+                property_value = read_result.propertyValue
+
+                # find the datatype
+                datatype, is_array, is_enumerated = _resolve_datatype(
+                    object_type, property_identifier
+                )
+
+                if datatype is not None:
+                    # special case for array parts, others are managed by cast_out
+                    if is_array and (property_array_index is not None):
+                        # build a dict for the array collecting length and all indices
+                        property_result = results_for_object.setdefault(
+                            property_label, {}
+                        )
+                        if property_array_index == 0:
+                            # array length as Unsigned
+                            property_result["length"] = property_value.cast_out(
+                                Unsigned
+                            )
+                        else:
+                            property_result[
+                                property_array_index
+                            ] = property_value.cast_out(datatype.subtype)
+                    elif is_enumerated and enum_to_int:
+                        results_for_object[property_label] = datatype(
+                            property_value.cast_out(datatype)
+                        ).get_long()
+                    else:
+                        results_for_object[property_label] = property_value.cast_out(
+                            datatype
+                        )
+
+    def _unpack_present_values(
+        self, iocb: IOCB, device_address_str: str
+    ) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Unpack the response of a request_values() request by object name.
+
+        Specialized version of _unpack_iocb for requests only containing the
+        presentValue property, which is never an array.
+        """
+        apdu = iocb.ioResponse
+
+        # should be ack
+        if not isinstance(apdu, ReadPropertyMultipleACK):
+            return None
+
+        result_values: Dict[str, Dict[str, Any]] = {}
+
+        object_names_get = self._object_names.get
+        result: ReadAccessResult
+        for result in apdu.listOfReadAccessResults:
+            object_identifier: Tuple[Union[str, int], int] = result.objectIdentifier
+            object_name: Optional[str] = object_names_get(
+                (device_address_str, *object_identifier)
+            )
+            if not object_name:
+                # we can't name the metric, so don't bother unpacking the values
+                continue
+
+            element: ReadAccessResultElement
+            for element in result.listOfResults:
                 read_result: ReadAccessResultElementChoice = element.readResult
 
-                # check for an error
                 if read_result.propertyAccessError is not None:
-                    if property_array_index is not None:
-                        property_label += "[" + str(property_array_index) + "]"
                     logger.error(
                         "Error reading property {} for object {} from device {}: {} ({})",
-                        property_label,
+                        element.propertyIdentifier,
                         object_identifier,
                         apdu.pduSource,
                         read_result.propertyAccessError.errorClass,
                         read_result.propertyAccessError.errorCode,
                     )
+                    continue
 
-                else:
-                    # here is the value
-                    property_value = read_result.propertyValue
-
-                    # find the datatype
-                    datatype = get_datatype(object_type, property_identifier)
-
-                    if datatype is not None:
-                        # special case for array parts, others are managed by cast_out
-                        if issubclass(datatype, Array) and (
-                            property_array_index is not None
-                        ):
-                            # build a dict for the array collecting length and all indices
-                            if property_array_index == 0:
-                                # array length as Unsigned
-                                property_result = results_for_object.get(
-                                    property_label, {}
-                                )
-                                property_result["length"] = property_value.cast_out(
-                                    Unsigned
-                                )
-                            else:
-                                property_result = results_for_object.get(
-                                    property_label, {}
-                                )
-                                property_result[
-                                    property_array_index
-                                ] = property_value.cast_out(datatype.subtype)
-                        elif issubclass(datatype, Enumerated) and enum_to_int:
-                            results_for_object[property_label] = datatype(
-                                property_value.cast_out(datatype)
-                            ).get_long()
-                        else:
-                            results_for_object[
-                                property_label
-                            ] = property_value.cast_out(datatype)
+                datatype, _, is_enumerated = _resolve_datatype(
+                    object_identifier[0], element.propertyIdentifier
+                )
+                if datatype is None:
+                    continue
+
+                present_value = read_result.propertyValue.cast_out(datatype)
+                if is_enumerated:
+                    present_value = datatype(present_value).get_long()
 
-            result_values[object_identifier] = results_for_object
+                result_values[object_name] = {"presentValue": present_value}
 
         return result_values
 
+    def _device_key(self, device_address: Address) -> Optional[Tuple[str, int]]:
+        device_key = self._device_keys.get(device_address)
+        if device_key is None:
+            device_info: DeviceInfo = self.deviceInfoCache.get_device_info(
+                device_address
+            )
+            if device_info is None:
+                return None
+            device_key = (str(device_address), device_info.deviceIdentifier)
+            self._device_keys[device_address] = device_key
+        return device_key
+
     def _iocb_callback(self, iocb: IOCB):
         if iocb.ioResponse:
             apdu = iocb.ioResponse
 
-            # should be ack
-            if not isinstance(apdu, ReadPropertyMultipleACK):
+            device_key = self._device_key(apdu.pduSource)
+            if device_key is None:
+                logger.error("Got values from unknown device {}", apdu.pduSource)
                 return
 
-            apdu: ReadPropertyMultipleACK
-
-            device_addr_str = str(apdu.pduSource)  # address of the device
-            device_info: DeviceInfo = self.deviceInfoCache.get_device_info(
-                apdu.pduSource
+            device_addr_str, device_identifier = device_key
+            device_name: Optional[str] = self._object_names.get(
+                (device_addr_str, "device", device_identifier)
             )
-            device_name: Optional[str] = self._object_info_cache.get(
-                (device_addr_str, "device", device_info.deviceIdentifier), {}
-            ).get("objectName")
 
             if device_name:
-                result_values_by_id = self._unpack_iocb(iocb, enum_to_int=True)
-
-                result_values = {}
-                for object_type, object_instance in result_values_by_id:
-                    object_name: Optional[str] = self._object_info_cache.get(
-                        (device_addr_str, object_type, object_instance), {}
-                    ).get("objectName")
+                # None if the response is not a ReadPropertyMultipleACK
+                result_values = self._unpack_present_values(iocb, device_addr_str)
 
-                    if object_name:
-                        result_values[object_name] = result_values_by_id[
-                            (object_type, object_instance)
-                        ]
-
-                self._put_result_in_source_queue(
-                    device_name, device_addr_str, result_values
-                )
+                if result_values is not None:
+                    self._put_result_in_source_queue(
+                        device_name, device_addr_str, result_values
+                    )
 
         # do something for error/reject/abort
         if iocb.ioError:
@@ -286,9 +504,23 @@ class BACnetMetricQReader(BIPSimpleApplication):
                 iocb.ioError,
             )
 
+    def _release_inflight_request(self, iocb: IOCB, device_address_str: str):
+        with self._inflight_requests_lock:
+            self._inflight_requests[device_address_str] -= 1
+
+    def _update_object_info_cache(
+        self, cache_updates: Sequence[Tuple[Tuple[str, str, int], Dict[str, Any]]]
+    ):
+        with self._object_info_cache_lock:
+            for cache_key, object_info in cache_updates:
+                cached_object_info = self._object_info_cache.setdefault(cache_key, {})
+                cached_object_info.update(object_info)
+                object_name = cached_object_info.get("objectName")
+                if object_name:
+                    self._object_names[cache_key] = object_name
+
     def who_is(self, low_limit=None, high_limit=None, address=None):
         super(BACnetMetricQReader, self).who_is(low_limit, high_limit, address)
-        # TODO maybe save request for incoming I-Am
 
     def do_IAmRequest(self, apdu):
         super(BACnetMetricQReader, self).do_IAmRequest(apdu)
@@ -301,91 +533,124 @@ class BACnetMetricQReader(BIPSimpleApplication):
 
         logger.debug("New device info {}", apdu.pduSource)
         self.deviceInfoCache.iam_device_info(apdu)
+        self._device_keys.pop(apdu.pduSource, None)
+
+        i_am_future = self._i_am_futures.pop(apdu.pduSource, None)
+        # a late I-Am must not resolve the future of a cancelled or timed out wait
+        if i_am_future is not None and not i_am_future.done():
+            self._event_loop.call_soon_threadsafe(_set_future_result, i_am_future, apdu)
+
+    def _queue_request(self, iocb: IOCB):
+        # this must be called from the event loop of the source
+        self._queued_iocbs.append(iocb)
+        if len(self._queued_iocbs) == 1:
+            self._event_loop.call_soon(self._flush_queued_requests)
+
+    def _flush_queued_requests(self):
+        queued_iocbs, self._queued_iocbs = self._queued_iocbs, []
+        deferred(self._request_io_batch, queued_iocbs)
+
+    def _request_io_batch(self, iocbs: List[IOCB]):
+        for iocb in iocbs:
+            self.request_io(iocb)
+
+    def _submit_request(
+        self, iocb: IOCB, request_timeout: Optional[Timedelta] = None
+    ) -> asyncio.Future:
+        """Submit the request to the BACpypes thread.
+
+        The returned future is resolved with the IOCB in the event loop of the source
+        when the request is completed, aborted or timed out.
+        """
+        iocb_future = self._event_loop.create_future()
+
+        def on_iocb_done(iocb: IOCB):
+            # this is called from the BACpypes thread
+            self._event_loop.call_soon_threadsafe(_set_future_result, iocb_future, iocb)
+
+        iocb.add_callback(on_iocb_done)
+        self._queue_request(iocb)
+        if request_timeout:
+            iocb.set_timeout(request_timeout.s)
+
+        return iocb_future
 
-    def request_device_properties(
+    async def request_device_properties(
         self,
         device_address_str: str,
         properties=None,
         skip_when_cached=False,
         request_timeout: Optional[Timedelta] = None,
     ):
-        if threading.current_thread() == threading.main_thread():
-            logger.error(
-                "request_device_properties called from main thread! Run it from an executor!",
-                stack_info=True,
-            )
-
-        if properties is None:
-            properties = ["objectName", "description"]
+        properties = (
+            _DEFAULT_DEVICE_PROPERTIES if properties is None else tuple(properties)
+        )
 
-        device_address = Address(device_address_str)
+        device_address = _address(device_address_str)
         device_info: DeviceInfo = self.deviceInfoCache.get_device_info(device_address)
 
         if not device_info:
-            for retry in range(self._retry_count):
-                deferred(self.who_is, address=device_address)
-                time.sleep(5 * (retry + 1))
-
-                device_info: DeviceInfo = self.deviceInfoCache.get_device_info(
-                    device_address
-                )
-                if device_info:
-                    break
-            else:
-                device_info: DeviceInfo = self.deviceInfoCache.get_device_info(
-                    device_address
-                )
+            i_am_future = None
+            try:
+                for retry in range(self._retry_count):
+                    # register before sending Who-Is, so we don't miss a fast I-Am
+                    i_am_future = self._i_am_futures.get(device_address)
+                    if i_am_future is None or i_am_future.done():
+                        i_am_future = self._event_loop.create_future()
+                        self._i_am_futures[device_address] = i_am_future
+                    deferred(self.who_is, address=device_address)
+                    try:
+                        # shield, other requests for this device may wait for it too
+                        await asyncio.wait_for(
+                            asyncio.shield(i_am_future), timeout=5 * (retry + 1)
+                        )
+                    except asyncio.TimeoutError:
+                        pass
 
-                if not device_info:
-                    logger.error(
-                        "Device with address {} is not in device cache!",
-                        device_address_str,
+                    device_info: DeviceInfo = self.deviceInfoCache.get_device_info(
+                        device_address
                     )
-                    return
+                    if device_info:
+                        break
+            finally:
+                # don't leave futures behind for unreachable devices, other waiters
+                # register a new one with their next Who-Is
+                if self._i_am_futures.get(device_address) is i_am_future:
+                    self._i_am_futures.pop(device_address, None)
+
+            if not device_info:
+                logger.error(
+                    "Device with address {} is not in device cache!",
+                    device_address_str,
+                )
+                return
 
         if skip_when_cached:
             cache_key = (device_address_str, "device", device_info.deviceIdentifier)
-            if cache_key in self._object_info_cache:
-                cached_object_info = self._object_info_cache[cache_key]
-                if all(property in cached_object_info for property in properties):
+            cached_object_info = self._object_info_cache.get(cache_key)
+            if cached_object_info is not None:
+                if cached_object_info.keys() >= frozenset(properties):
                     logger.debug("Device info already in cache. Skipping!")
                     return
 
-        prop_reference_list = [
-            PropertyReference(propertyIdentifier=property) for property in properties
-        ]
-
         device_object_identifier = ("device", device_info.deviceIdentifier)
 
-        read_access_spec = ReadAccessSpecification(
-            objectIdentifier=device_object_identifier,
-            listOfPropertyReferences=prop_reference_list,
+        read_access_spec = _read_access_specification(
+            device_object_identifier, properties
         )
 
         request = ReadPropertyMultipleRequest(listOfReadAccessSpecs=[read_access_spec])
         request.pduDestination = device_address
 
-        iocb = IOCB(request)
-        deferred(self.request_io, iocb)
-        if request_timeout:
-            iocb.set_timeout(request_timeout.s)
-
-        iocb.wait()
+        iocb = await self._submit_request(IOCB(request), request_timeout)
 
         if iocb.ioResponse:
             result_values = self._unpack_iocb(iocb)
             if device_object_identifier in result_values:
-                with self._object_info_cache_lock:
-                    cache_key = (
-                        device_address_str,
-                        "device",
-                        device_info.deviceIdentifier,
-                    )
-                    if cache_key not in self._object_info_cache:
-                        self._object_info_cache[cache_key] = {}
-                    self._object_info_cache[cache_key].update(
-                        result_values[device_object_identifier]
-                    )
+                cache_key = (device_address_str, "device", device_info.deviceIdentifier)
+                self._update_object_info_cache(
+                    [(cache_key, result_values[device_object_identifier])]
+                )
 
             return result_values[device_object_identifier]
 
@@ -401,7 +666,7 @@ class BACnetMetricQReader(BIPSimpleApplication):
 
         return None
 
-    def request_object_properties(
+    async def request_object_properties(
         self,
         device_address_str: str,
         objects: Sequence[Tuple[Union[int, str], int]],
@@ -410,25 +675,21 @@ class BACnetMetricQReader(BIPSimpleApplication):
         chunk_size: Optional[int] = None,
         request_timeout: Optional[Timedelta] = None,
     ):
-        if threading.current_thread() == threading.main_thread():
-            logger.error(
-                "request_object_properties called from main thread! Run it from an executor!",
-                stack_info=True,
-            )
-
-        if properties is None:
-            properties = ["objectName", "description", "units"]
+        properties = (
+            _DEFAULT_OBJECT_PROPERTIES if properties is None else tuple(properties)
+        )
 
-        device_address = Address(device_address_str)
+        device_address = _address(device_address_str)
         device_info: DeviceInfo = self.deviceInfoCache.get_device_info(device_address)
 
         if skip_when_cached:
+            required_properties = frozenset(properties)
             object_to_request = []
             for object_type, object_instance in objects:
                 cache_key = (device_address_str, object_type, object_instance)
-                if cache_key in self._object_info_cache:
-                    cached_object_info = self._object_info_cache[cache_key]
-                    if all(property in cached_object_info for property in properties):
+                cached_object_info = self._object_info_cache.get(cache_key)
+                if cached_object_info is not None:
+                    if cached_object_info.keys() >= required_properties:
                         logger.debug(
                             "Object info for {} already in cache. Skipping!",
                             (object_type, object_instance),
@@ -450,17 +711,11 @@ class BACnetMetricQReader(BIPSimpleApplication):
             if device_info and device_info.segmentationSupported == "noSegmentation":
                 chunk_size = 4
 
+        # keep the next chunk in flight while the previous response is unpacked
+        pending_requests: Deque[Tuple[asyncio.Future, List]] = deque()
         for objects_chunk in chunks(objects, chunk_size):
-            prop_reference_list = [
-                PropertyReference(propertyIdentifier=property)
-                for property in properties
-            ]
-
             read_access_specs = [
-                ReadAccessSpecification(
-                    objectIdentifier=ObjectIdentifier(object_identifier),
-                    listOfPropertyReferences=prop_reference_list,
-                )
+                _read_access_specification(object_identifier, properties)
                 for object_identifier in objects_chunk
             ]
 
@@ -469,40 +724,80 @@ class BACnetMetricQReader(BIPSimpleApplication):
             )
             request.pduDestination = device_address
 
-            iocb = IOCB(request)
-            deferred(self.request_io, iocb)
-            if request_timeout:
-                iocb.set_timeout(request_timeout.s)
-
-            iocb.wait()
-
-            if iocb.ioResponse:
-                chunk_result_values = self._unpack_iocb(iocb)
-                for object_identifier in chunk_result_values:
-                    object_type, object_instance = object_identifier
-                    with self._object_info_cache_lock:
-                        cache_key = (device_address_str, object_type, object_instance)
-                        if cache_key not in self._object_info_cache:
-                            self._object_info_cache[cache_key] = {}
-                        self._object_info_cache[cache_key].update(
-                            chunk_result_values[object_identifier]
-                        )
-
-                result_values.update(chunk_result_values)
+            iocb_future = self._submit_request(IOCB(request), request_timeout)
 
-            # do something for error/reject/abort
-            if iocb.ioError:
-                logger.error(
-                    "IOCB returned with error for object properties request (device {}, objects {}, props {}): {}",
+            pending_requests.append((iocb_future, objects_chunk))
+            if len(pending_requests) > 1:
+                iocb_future, pending_objects_chunk = pending_requests.popleft()
+                self._handle_object_properties_response(
+                    await iocb_future,
+                    pending_objects_chunk,
                     device_address_str,
-                    objects,
                     properties,
-                    iocb.ioError,
+                    result_values,
                 )
-                # TODO: maybe raise error here
+
+        while pending_requests:
+            iocb_future, pending_objects_chunk = pending_requests.popleft()
+            self._handle_object_properties_response(
+                await iocb_future,
+                pending_objects_chunk,
+                device_address_str,
+                properties,
+                result_values,
+            )
 
         return result_values
 
+    def _handle_object_properties_response(
+        self,
+        iocb: IOCB,
+        objects_chunk: List[Tuple[Union[int, str], int]],
+        device_address_str: str,
+        properties: Tuple[str, ...],
+        result_values: Dict,
+    ):
+        if iocb.ioResponse:
+            chunk_result_values = self._unpack_iocb(iocb)
+            cache_updates = [
+                ((device_address_str, *object_identifier), object_info)
+                for object_identifier, object_info in chunk_result_values.items()
+            ]
+            self._update_object_info_cache(cache_updates)
+
+            result_values.update(chunk_result_values)
+
+        # do something for error/reject/abort
+        if iocb.ioError:
+            logger.error(
+                "IOCB returned with error for object properties request (device {}, objects {}, props {}): {}",
+                device_address_str,
+                objects_chunk,
+                properties,
+                iocb.ioError,
+            )
+            # TODO: maybe raise error here
+
+    @staticmethod
+    def _value_chunk_size(device_info: Optional[DeviceInfo]) -> int:
+        # we adjusted chunking for object property request, which requested 3 properties per object
+        # here we request only 1 property so scale
+        chunk_scale = 3
+
+        if device_info and device_info.segmentationSupported == "noSegmentation":
+            # the whole response has to fit into a single APDU, an overflowing one
+            # gets aborted, so only ever shrink the conservative default chunk
+            return max(
+                1,
+                min(
+                    4 * chunk_scale,
+                    (device_info.maxApduLengthAccepted - _APDU_OVERHEAD)
+                    // _PRESENT_VALUE_RESULT_SIZE,
+                ),
+            )
+
+        return 20 * chunk_scale
+
     def request_values(
         self,
         device_address_str: str,
@@ -510,47 +805,106 @@ class BACnetMetricQReader(BIPSimpleApplication):
         chunk_size: Optional[int] = None,
         request_timeout: Optional[Timedelta] = None,
     ):
-        device_address = Address(device_address_str)
-        device_info: DeviceInfo = self.deviceInfoCache.get_device_info(device_address)
+        if not self._batch_wait:
+            self._send_value_requests(
+                device_address_str, objects, chunk_size, request_timeout
+            )
+            return
 
-        # we adjusted chunking for object property request, which requested 3 properties per object
-        # here we request only 1 property so scale
-        chunk_scale = 3
+        pending_value_requests = self._pending_value_requests.setdefault(
+            device_address_str, []
+        )
+        pending_value_requests.append((objects, chunk_size, request_timeout))
+        if len(pending_value_requests) == 1:
+            self._event_loop.call_later(
+                self._batch_wait.s, self._flush_value_requests, device_address_str
+            )
+
+    def _flush_value_requests(self, device_address_str: str):
+        pending_value_requests = self._pending_value_requests.pop(device_address_str)
+
+        # merge the objects of all requests, skipping objects requested twice
+        objects = list(
+            dict.fromkeys(
+                object_identifier
+                for objects, _, _ in pending_value_requests
+                for object_identifier in objects
+            )
+        )
+        chunk_size = min(
+            (chunk_size for _, chunk_size, _ in pending_value_requests if chunk_size),
+            default=None,
+        )
+        request_timeout = max(
+            (
+                request_timeout
+                for _, _, request_timeout in pending_value_requests
+                if request_timeout
+            ),
+            key=lambda request_timeout: request_timeout.ns,
+            default=None,
+        )
+
+        self._send_value_requests(
+            device_address_str, objects, chunk_size, request_timeout
+        )
+
+    def _send_value_requests(
+        self,
+        device_address_str: str,
+        objects: Sequence[Tuple[Union[int, str], int]],
+        chunk_size: Optional[int] = None,
+        request_timeout: Optional[Timedelta] = None,
+    ):
+        device_address = _address(device_address_str)
+        device_info: DeviceInfo = self.deviceInfoCache.get_device_info(device_address)
 
         if not chunk_size:
-            chunk_size = 20 * chunk_scale
-            if device_info and device_info.segmentationSupported == "noSegmentation":
-                chunk_size = 4 * chunk_scale
+            chunk_size = self._value_chunk_size(device_info)
 
         logger.debug(f"Chunking for device {device_address_str} is {chunk_size}")
 
-        for objects_chunk in chunks(objects, chunk_size):
-            prop_reference_list = [PropertyReference(propertyIdentifier="presentValue")]
+        # the objects of a device are polled with the same requests every interval
+        read_access_spec_chunks = _read_access_specification_chunks(
+            tuple(objects), ("presentValue",), chunk_size
+        )
 
-            read_access_specs = [
-                ReadAccessSpecification(
-                    objectIdentifier=ObjectIdentifier(object_identifier),
-                    listOfPropertyReferences=prop_reference_list,
+        with self._inflight_requests_lock:
+            inflight_requests = self._inflight_requests.get(device_address_str, 0)
+            # always allow a poll if nothing is in flight, even if it has more chunks
+            if (
+                inflight_requests
+                and inflight_requests + len(read_access_spec_chunks)
+                > self._max_inflight_requests
+            ):
+                logger.warning(
+                    "Skipping value request for device {}, {} requests still in flight",
+                    device_address_str,
+                    inflight_requests,
                 )
-                for object_identifier in objects_chunk
-            ]
+                return
+            self._inflight_requests[device_address_str] = inflight_requests + len(
+                read_access_spec_chunks
+            )
 
+        for read_access_specs in read_access_spec_chunks:
             request = ReadPropertyMultipleRequest(
                 listOfReadAccessSpecs=read_access_specs
             )
             request.pduDestination = device_address
 
             iocb = IOCB(request)
+            iocb.add_callback(self._release_inflight_request, device_address_str)
             iocb.add_callback(self._iocb_callback)
             if request_timeout:
                 iocb.set_timeout(request_timeout.s)
 
-            deferred(self.request_io, iocb)
+            self._queue_request(iocb)
 
     def get_device_info(
         self, device_address_str: str, device_identifier: Optional[int] = None
     ):
-        device_address = Address(device_address_str)
+        device_address = _address(device_address_str)
         device_info: DeviceInfo = self.deviceInfoCache.get_device_info(device_address)
         if device_info:
             if device_identifier and device_info.deviceIdentifier != device_identifier:
@@ -575,8 +929,9 @@ class BACnetMetricQReader(BIPSimpleApplication):
         self, device_address_str: str, object_type, object_instance
     ) -> Optional[Dict[str, Any]]:
         cache_key = (device_address_str, object_type, object_instance)
-        if cache_key in self._object_info_cache:
-            return self._object_info_cache[cache_key]
+        object_info = self._object_info_cache.get(cache_key)
+        if object_info is not None:
+            return object_info
 
         # TODO maybe fill cache here
 
@@ -610,9 +965,17 @@ class BACnetMetricQReader(BIPSimpleApplication):
         return cached_devices
 
     def get_device_id_for_ip(self, device_address_str: str):
-        device_address = Address(device_address_str)
+        device_address = _address(device_address_str)
         device_info: DeviceInfo = self.deviceInfoCache.get_device_info(device_address)
         if device_info:
             return device_info.deviceIdentifier
 
         return None
+
+    def get_segmentation_support_for_ip(self, device_address_str: str):
+        device_address = _address(device_address_str)
+        device_info: DeviceInfo = self.deviceInfoCache.get_device_info(device_address)
+        if device_info:
+            return device_info.segmentationSupported
+
+        return None
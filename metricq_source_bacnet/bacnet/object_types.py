@@ -17,14 +17,21 @@ class CustomOptionalProperty(Property):
         Property.__init__(self, identifier, datatype, default, optional, mutable)
 
 
+# vendor specific address
+VENDOR_SPECIFIC_ADDRESS_PROPERTY = CustomOptionalProperty(3000, CharacterString)
+
+
 class ExtendedAnalogInputObject(AnalogInputObject):
-    properties = [CustomOptionalProperty(3000, CharacterString)]
+    properties = [VENDOR_SPECIFIC_ADDRESS_PROPERTY]
 
 
 class ExtendedAnalogValueObject(AnalogValueObject):
-    properties = [CustomOptionalProperty(3000, CharacterString)]
+    properties = [VENDOR_SPECIFIC_ADDRESS_PROPERTY]
+
+
+EXTENDED_OBJECT_TYPES = (ExtendedAnalogInputObject, ExtendedAnalogValueObject)
 
 
 def register_extended_object_types():
-    register_object_type(ExtendedAnalogInputObject, vendor_id=7)
-    register_object_type(ExtendedAnalogValueObject, vendor_id=7)
+    for extended_object_type in EXTENDED_OBJECT_TYPES:
+        register_object_type(extended_object_type, vendor_id=7)
@@ -17,6 +17,7 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with metricq-source-bacnet.  If not, see <http://www.gnu.org/licenses/>.
+import asyncio
 import logging
 import sys
 
@@ -24,6 +25,7 @@ import click as click
 
 import aiomonitor
 import click_log
+from metricq import Timedelta
 from metricq.logging import get_logger
 
 from .source import BacnetSource
@@ -42,9 +44,37 @@ logger.handlers[0].formatter = logging.Formatter(
 @click.option("--token", default="source-bacnet")
 @click.option("--monitor/--no-monitor", default=False)
 @click.option("--log-to-journal/--no-log-to-journal", default=False)
+@click.option("--uvloop/--no-uvloop", "use_uvloop", default=False)
 @click.option("--disk-cache-filename", default="metricq-source-bacnet-disk-cache.json")
+@click.option(
+    "--batch-wait-ms",
+    default=0,
+    type=click.IntRange(min=0),
+    help="Collect value requests per device for this time and send them together",
+)
+@click.option(
+    "--result-queue-size",
+    default=1024,
+    type=click.IntRange(min=1),
+    help="Maximum number of BACnet responses waiting to be sent, newer ones are dropped",
+)
+@click.option(
+    "--coalesce-results/--no-coalesce-results",
+    default=False,
+    help="Only send the latest value of each metric when results queue up",
+)
 @click_log.simple_verbosity_option(logger)
-def source_cmd(server, token, monitor, log_to_journal, disk_cache_filename):
+def source_cmd(
+    server,
+    token,
+    monitor,
+    log_to_journal,
+    use_uvloop,
+    disk_cache_filename,
+    batch_wait_ms,
+    result_queue_size,
+    coalesce_results,
+):
     if log_to_journal:
         try:
             from systemd import journal
@@ -53,8 +83,22 @@ def source_cmd(server, token, monitor, log_to_journal, disk_cache_filename):
         except ImportError:
             logger.error("Can't enable journal logger, systemd package not found!")
 
+    if use_uvloop:
+        # has to happen before the source creates its event loop
+        try:
+            import uvloop
+
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            logger.error("Can't enable uvloop, uvloop package not found!")
+
     src = BacnetSource(
-        token=token, management_url=server, disk_cache_filename=disk_cache_filename
+        token=token,
+        management_url=server,
+        disk_cache_filename=disk_cache_filename,
+        batch_wait=Timedelta.from_ms(batch_wait_ms) if batch_wait_ms else None,
+        result_queue_size=result_queue_size,
+        coalesce_results=coalesce_results,
     )
     try:
         if monitor:
@@ -18,52 +18,114 @@
 # You should have received a copy of the GNU General Public License
 # along with metricq-source-bacnet.  If not, see <http://www.gnu.org/licenses/>.
 import asyncio
-import functools
 import random
-import threading
+import sys
 from asyncio import Future, Task
+from dataclasses import dataclass
+from functools import lru_cache
 
 from metricq.exceptions import RPCError
 from string import Template
-from typing import Dict, List, Optional, Tuple, Union, Set
+from typing import Callable, Dict, List, Optional, Tuple, Union, Set
 
-from bacpypes.pdu import Address
 from metricq import Source, Timedelta, Timestamp, get_logger, rpc_handler
 from metricq_source_bacnet.bacnet.application import BACnetMetricQReader
 from metricq_source_bacnet.bacnet.object_types import register_extended_object_types
 
 logger = get_logger(__name__)
 
+# put into the result queue to stop the main task after all results are sent
+_STOP_MAIN_TASK = object()
+
 
 def unpack_range(range_str: str) -> List[int]:
     ret = []
     for r in range_str.split(","):
         if "-" in r:
             start, stop = r.split("-")
-            for i in range(int(start), int(stop) + 1):
-                ret.append(i)
+            ret.extend(range(int(start), int(stop) + 1))
         else:
             ret.append(int(r))
     return ret
 
 
-def substitute_all(string: str, substitutions: dict) -> str:
-    for k, v in substitutions.items():
-        string = string.replace(k, v)
-    return string
+def compile_substitutions(substitutions: Dict[str, str]) -> Callable[[str], str]:
+    """Build a function applying the substitutions one after another, in order.
+
+    Later substitutions see the output of earlier ones, like in the config.
+    """
+    substitutions = tuple(substitutions.items())
+    if not substitutions:
+        return lambda string: string
+
+    def substitute_all(string: str) -> str:
+        for old, new in substitutions:
+            string = string.replace(old, new)
+        return string
+
+    return substitute_all
+
+
+# replace quotes with dots, metric ids additionally must not contain spaces
+_DESCRIPTION_TRANSLATION = str.maketrans({"'": ".", "`": ".", "´": "."})
+_METRIC_ID_TRANSLATION = str.maketrans({"'": ".", "`": ".", "´": ".", " ": None})
+
+
+@lru_cache(maxsize=256)
+def _template(template_str: str) -> Template:
+    return Template(template_str)
+
+
+@lru_cache(maxsize=4096)
+def render_metric_id(
+    metric_id_template: str, object_name: str, device_name: str
+) -> str:
+    # TODO maybe support more placeholders
+    return (
+        _template(metric_id_template)
+        .safe_substitute({"objectName": object_name, "deviceName": device_name})
+        .translate(_METRIC_ID_TRANSLATION)
+    )
+
+
+@dataclass
+class ObjectGroup:
+    device_address_str: str
+    object_type: str
+    object_instances: List[int]
+    interval: float
+    metric_id: str
+    description: str
+    chunk_size: Optional[int] = None
+    device_identifier: Optional[int] = None
+    nan_at_timeout: Optional[bool] = None
 
 
 class BacnetSource(Source):
-    def __init__(self, *args, disk_cache_filename=None, **kwargs):
+    def __init__(
+        self,
+        *args,
+        disk_cache_filename=None,
+        batch_wait: Optional[Timedelta] = None,
+        result_queue_size: int = 1024,
+        coalesce_results: bool = False,
+        **kwargs,
+    ):
         super().__init__(*args, **kwargs)
         self._bacnet_reader: Optional[BACnetMetricQReader] = None
-        self._result_queue = asyncio.Queue()
-        self._main_task_stop_future = None
+        # bounded, so values don't pile up in memory while sending stalls
+        self._result_queue = asyncio.Queue(maxsize=result_queue_size)
+        self._coalesce_results = coalesce_results
+        # set by stop(), the main task is about to end and takes no more results
+        self._stopping = False
         self._worker_stop_futures: List[Future] = []
         self._worker_tasks: List[Task] = []
         self.disk_cache_filename = disk_cache_filename
+        self.batch_wait = batch_wait
         self._old_bacnet_reader_config = {}
         self._last_time_send_by_metric: Dict[str, Timestamp] = {}
+        # metric ids by BACnet object name per device, filled by the worker tasks
+        self._metric_ids: Dict[str, Dict[str, str]] = {}
 
         register_extended_object_types()
 
@@ -85,6 +147,7 @@ class BacnetSource(Source):
                 reader_object_identifier=config["bacnetReaderObjectIdentifier"],
                 put_result_in_source_queue_fn=self._bacnet_reader_put_result_in_source_queue,
                 disk_cache_filename=self.disk_cache_filename,
+                batch_wait=self.batch_wait,
                 retry_count=config.get("bacnetReaderRetryCount", 10),
             )
             self._old_bacnet_reader_config = {
@@ -118,10 +181,12 @@ class BacnetSource(Source):
                     "Can't change bacnetReaderRetryCount with reconfiguration. Please restart!"
                 )
 
-        self._object_groups: List[Dict[str, Union[str, int]]] = []
+        self._object_groups: List[ObjectGroup] = []
+        self._metric_ids = {}
         self._device_config: Dict[str, Dict] = {}
         config_error = False
         for device_address_str, device_config in config["devices"].items():
+            device_address_str = sys.intern(device_address_str)
             object_instances_by_type: Dict[str, Set[int]] = {}
             object_group_device_config = {
                 "metric_id": device_config["metricId"],
@@ -133,18 +198,9 @@ class BacnetSource(Source):
 
             self._device_config[device_address_str] = object_group_device_config
 
-            object_group_device_config["device_address_str"] = device_address_str
-
             for object_config in device_config["objectGroups"]:
                 object_instances = unpack_range(object_config["objectInstance"])
-                object_type = object_config["objectType"]
-
-                object_group_config = {
-                    "object_type": object_type,
-                    "object_instances": object_instances,
-                    "interval": object_config["interval"],
-                }
-                object_group_config.update(object_group_device_config)
+                object_type = sys.intern(object_config["objectType"])
 
                 if object_type in object_instances_by_type:
                     diff_set = object_instances_by_type[object_type] & set(object_instances)
@@ -157,15 +213,25 @@ class BacnetSource(Source):
                 else:
                     object_instances_by_type[object_type] = set(object_instances)
 
-                if "description" in object_config:
-                    object_group_config["description"] = object_config["description"]
-
-                if "nanAtTimeout" in object_config:
-                    object_group_config["nan_at_timeout"] = object_config[
-                        "nanAtTimeout"
-                    ]
-
-                self._object_groups.append(object_group_config)
+                self._object_groups.append(
+                    ObjectGroup(
+                        device_address_str=device_address_str,
+                        object_type=object_type,
+                        object_instances=object_instances,
+                        interval=object_config["interval"],
+                        metric_id=object_group_device_config["metric_id"],
+                        description=object_config.get(
+                            "description", object_group_device_config["description"]
+                        ),
+                        chunk_size=object_group_device_config["chunk_size"],
+                        device_identifier=object_group_device_config[
+                            "device_identifier"
+                        ],
+                        nan_at_timeout=object_config.get(
+                            "nanAtTimeout", object_group_device_config["nan_at_timeout"]
+                        ),
+                    )
+                )
 
         if config_error:
             raise ValueError("Config has errors! See previous log.")
@@ -174,21 +240,24 @@ class BacnetSource(Source):
             "vendorSpecificMapping", {}
         )
 
-        self._object_description_vendor_specific_substitutions = config.get(
-            "vendorSpecificDescriptionSubstitutions", {}
+        self._substitute_object_description = compile_substitutions(
+            config.get("vendorSpecificDescriptionSubstitutions", {})
         )
 
-        self._object_name_vendor_specific_substitutions = config.get(
-            "vendorSpecificNameSubstitutions", {}
+        self._substitute_object_name = compile_substitutions(
+            config.get("vendorSpecificNameSubstitutions", {})
         )
 
-        self._object_type_filter = (
+        # names after mapping and substitution, only valid for this config
+        self._normalized_names: Dict[str, str] = {}
+
+        object_type_filter = set(
             config.get(
                 "discoverObjectTypeFilter",
                 ["analogValue", "analogInput", "analogOutput", "pulseConverter"],
             )
-            + ["device"]
         )
+        object_type_filter.add("device")
 
         self._worker_stop_futures = []
         self._worker_tasks = []
@@ -196,79 +265,87 @@ class BacnetSource(Source):
         self._worker_tasks_count_starting = 0
         self._worker_tasks_count_running = 0
         self._worker_tasks_count_failed = 0
+        # object groups of a device with the same interval are polled together
+        object_groups_by_device_and_interval: Dict[
+            Tuple[str, float], List[ObjectGroup]
+        ] = {}
         for object_group in self._object_groups:
-            if object_group["object_type"] not in self._object_type_filter:
-                self._object_type_filter.append(object_group["object_type"])
+            object_type_filter.add(object_group.object_type)
+
+            object_groups_by_device_and_interval.setdefault(
+                (object_group.device_address_str, object_group.interval), []
+            ).append(object_group)
+
+        self._object_type_filter = frozenset(object_type_filter)
 
+        # spread the worker starts evenly over 10 s, so devices aren't queried at once,
+        # with a random start in each slot, so several sources don't poll in lockstep
+        worker_count = len(object_groups_by_device_and_interval)
+        for worker_index, object_groups in enumerate(
+            object_groups_by_device_and_interval.values()
+        ):
             worker_stop_future = self.event_loop.create_future()
             self._worker_stop_futures.append(worker_stop_future)
 
+            start_delay = 10 * (worker_index + random.random()) / worker_count + 0.01
             self._worker_tasks.append(
                 self.event_loop.create_task(
-                    self._worker_task(object_group, worker_stop_future)
+                    self._worker_task(object_groups, worker_stop_future, start_delay)
                 )
             )
 
         self._worker_tasks_count_expected = len(self._worker_tasks)
 
     async def task(self):
-        self._main_task_stop_future = self.event_loop.create_future()
-
         logger.info(
             f"Current worker count (expected/starting/running/failed): ({self._worker_tasks_count_expected}/{self._worker_tasks_count_starting}/{self._worker_tasks_count_running}/{self._worker_tasks_count_failed})"
         )
         last_state_log = Timestamp.now()
 
         while True:
-            queue_get_task = asyncio.create_task(self._result_queue.get())
-            done, pending = await asyncio.wait(
-                {queue_get_task, self._main_task_stop_future},
-                return_when=asyncio.FIRST_COMPLETED,
-            )
-
-            if queue_get_task in done:
-                result: Tuple[Timestamp, str, str, Dict] = queue_get_task.result()
-
-                timestamp, device_name, device_address_string, result_values = result
-
-                device_config = self._device_config[device_address_string]
-                device_name = self._object_name_vendor_specific_mapping.get(
-                    device_name, device_name
-                )
-
-                device_name = substitute_all(
-                    device_name, self._object_name_vendor_specific_substitutions
-                )
-
-                for object_name, object_result in result_values.items():
-                    object_name = self._object_name_vendor_specific_mapping.get(
-                        object_name, object_name
-                    )
+            results = [await self._result_queue.get()]
+            # handle everything that queued up meanwhile in one go
+            while not self._result_queue.empty():
+                results.append(self._result_queue.get_nowait())
+
+            stop = False
+            # the values of one result belong to different metrics
+            value_batches = []
+            for result in results:
+                if result is _STOP_MAIN_TASK:
+                    stop = True
+                    continue
+                value_batches.append(self._values_for_result(result))
 
-                    object_name = substitute_all(
-                        object_name, self._object_name_vendor_specific_substitutions
+            if self._coalesce_results and len(value_batches) > 1:
+                # falling behind, only send the latest value of each metric
+                value_batches = [
+                    list(
+                        {
+                            value[0]: value
+                            for values in value_batches
+                            for value in values
+                        }.values()
                     )
+                ]
 
-                    # TODO maybe support more placeholders
-                    metric_id = (
-                        Template(device_config["metric_id"])
-                        .safe_substitute(
-                            {"objectName": object_name, "deviceName": device_name}
+            try:
+                # a metric must not be sent concurrently, metricq would publish its
+                # pending chunk twice, so only the values of one batch are gathered
+                for values in value_batches:
+                    await asyncio.gather(
+                        *(
+                            self.send(metric_id, timestamp, value)
+                            for metric_id, timestamp, value in values
                         )
-                        .replace("'", ".")
-                        .replace("`", ".")
-                        .replace("´", ".")
-                        .replace(" ", "")
                     )
-                    if "presentValue" in object_result and isinstance(
-                        object_result["presentValue"], (int, float)
-                    ):
-                        await self.send(
-                            metric_id, timestamp, object_result["presentValue"]
-                        )
-                        self._last_time_send_by_metric[metric_id] = timestamp
+            finally:
+                for _ in results:
+                    self._result_queue.task_done()
 
-                self._result_queue.task_done()
+            if stop:
+                logger.info("stopping BACnetSource main task")
+                break
 
             if Timestamp.now() - last_state_log > Timedelta.from_string("5min"):
                 logger.info(
@@ -276,9 +353,47 @@ class BacnetSource(Source):
                 )
                 last_state_log = Timestamp.now()
 
-            if self._main_task_stop_future in done:
-                logger.info("stopping BACnetSource main task")
-                break
+    def _values_for_result(
+        self, result: Tuple[Timestamp, str, str, Dict]
+    ) -> List[Tuple[str, Timestamp, Union[int, float]]]:
+        timestamp, device_name, device_address_string, result_values = result
+
+        metric_ids = self._metric_ids.setdefault(device_address_string, {})
+
+        values = []
+        for object_name, object_result in result_values.items():
+            metric_id = metric_ids.get(object_name)
+            if metric_id is None:
+                metric_id = self._render_metric_id(
+                    device_address_string, device_name, object_name
+                )
+                metric_ids[object_name] = metric_id
+
+            present_value = object_result.get("presentValue")
+            if isinstance(present_value, (int, float)):
+                values.append((metric_id, timestamp, present_value))
+                self._last_time_send_by_metric[metric_id] = timestamp
+
+        return values
+
+    def _render_metric_id(
+        self, device_address_str: str, device_name: str, object_name: str
+    ) -> str:
+        return render_metric_id(
+            self._device_config[device_address_str]["metric_id"],
+            self._normalize_name(object_name),
+            self._normalize_name(device_name),
+        )
+
+    def _normalize_name(self, name: str) -> str:
+        """Apply the vendor specific mapping and name substitutions to a name."""
+        normalized_name = self._normalized_names.get(name)
+        if normalized_name is None:
+            normalized_name = self._substitute_object_name(
+                self._object_name_vendor_specific_mapping.get(name, name)
+            )
+            self._normalized_names[name] = normalized_name
+        return normalized_name
 
     async def stop(self, exception: Optional[Exception] = None):
         logger.debug("stop()")
@@ -307,10 +422,15 @@ class BacnetSource(Source):
                 exc_info=(ex.__class__, ex, ex.__traceback__),
             )
 
+        # results handed over before the reader stopped are already scheduled in the
+        # event loop, let them reach the queue before nothing else is accepted
+        await asyncio.sleep(0)
+        self._stopping = True
+
         await self._result_queue.join()
 
-        if self._main_task_stop_future is not None:
-            self._main_task_stop_future.set_result(None)
+        # the queue is empty and nothing else is put in
+        self._result_queue.put_nowait(_STOP_MAIN_TASK)
 
         await super().stop(exception)
 
@@ -318,64 +438,66 @@ class BacnetSource(Source):
     def _bacnet_reader_put_result_in_source_queue(
         self, device_name: str, device_address_string: str, result_values: Dict
     ):
-        fut = asyncio.run_coroutine_threadsafe(
-            self._result_queue.put(
-                (Timestamp.now(), device_name, device_address_string, result_values)
-            ),
-            loop=self.event_loop,
-        )
+        # don't wait for the event loop, the bacpypes thread has to handle other responses
         try:
-            fut.result()
+            self.event_loop.call_soon_threadsafe(
+                self._put_result_in_queue,
+                (Timestamp.now(), device_name, device_address_string, result_values),
+            )
         except Exception:
             logger.exception("Can't put BACnet result in queue!")
 
-    async def _worker_task(self, object_group, worker_task_stop_future):
-        start_time = Timestamp.now()
-        interval = object_group["interval"]
-        device_address_str = object_group["device_address_str"]
-        object_type = object_group["object_type"]
-        objects = [
-            (object_type, instance) for instance in object_group["object_instances"]
-        ]
-        chunk_size = object_group.get("chunk_size")
+    def _put_result_in_queue(self, result: Tuple[Timestamp, str, str, Dict]):
+        if self._stopping:
+            return
+        try:
+            self._result_queue.put_nowait(result)
+        except asyncio.QueueFull:
+            logger.warning(
+                "Result queue is full, dropping values of device {}!", result[2]
+            )
 
-        logger.debug(
-            f"starting BACnetSource worker task for device {device_address_str}"
+    async def _worker_task(
+        self,
+        object_groups: List[ObjectGroup],
+        worker_task_stop_future,
+        start_delay: float = 0.01,
+    ):
+        # all object groups have the same device and interval
+        start_time = Timestamp.now()
+        interval = object_groups[0].interval
+        device_address_str = object_groups[0].device_address_str
+        # a tuple, so the reader can use it as key for its request cache as is
+        objects = tuple(
+            (object_group.object_type, instance)
+            for object_group in object_groups
+            for instance in object_group.object_instances
         )
+        chunk_size = object_groups[0].chunk_size
 
         logger.debug(
-            "This is {} the main thread.",
-            "" if threading.current_thread() == threading.main_thread() else "not",
+            f"starting BACnetSource worker task for device {device_address_str}"
         )
 
-        # wait for random time between 10 ms and 10.01s
-        random_wait_time = random.random() * 10 + 0.01
-        await asyncio.sleep(random_wait_time)
+        await asyncio.sleep(start_delay)
         self._worker_tasks_count_starting += 1
 
-        await self.event_loop.run_in_executor(
-            None,
-            functools.partial(
-                self._bacnet_reader.request_device_properties,
-                device_address_str,
-                skip_when_cached=True,
-                request_timeout=Timedelta.from_s(30),
-            ),
+        await self._bacnet_reader.request_device_properties(
+            device_address_str,
+            skip_when_cached=True,
+            request_timeout=Timedelta.from_s(30),
         )
-        await self.event_loop.run_in_executor(
-            None,
-            functools.partial(
-                self._bacnet_reader.request_object_properties,
-                device_address_str,
-                objects,
-                skip_when_cached=True,
-                chunk_size=chunk_size,
-                request_timeout=Timedelta.from_s(30),
-            ),
+        await self._bacnet_reader.request_object_properties(
+            device_address_str,
+            objects,
+            skip_when_cached=True,
+            chunk_size=chunk_size,
+            request_timeout=Timedelta.from_s(30),
         )
 
         device_info = self._bacnet_reader.get_device_info(
-            device_address_str, device_identifier=object_group.get("device_identifier")
+            device_address_str,
+            device_identifier=object_groups[0].device_identifier,
         )
         if device_info is None:
             logger.error(
@@ -384,64 +506,53 @@ class BacnetSource(Source):
             self._worker_tasks_count_failed += 1
             return
 
-        device_name = self._object_name_vendor_specific_mapping.get(
-            device_info["objectName"], device_info["objectName"]
-        )
-
-        device_name = substitute_all(
-            device_name, self._object_name_vendor_specific_substitutions
-        )
+        device_name = self._normalize_name(device_info["objectName"])
 
         metrics = {}
+        # metrics of object groups with nanAtTimeout
+        nan_at_timeout_metrics = []
         missing_metrics = 0
 
-        for object_instance in object_group["object_instances"]:
-            metadata = {
+        for object_group in object_groups:
+            object_type = object_group.object_type
+            group_metadata = {
                 "rate": 1.0 / interval,
                 "device": device_address_str,
                 "objectType": object_type,
-                "objectInstance": object_instance,
             }
-            object_info = self._bacnet_reader.get_object_info(
-                device_address_str, object_type, object_instance
-            )
-            if (
-                object_info is None
-                or "objectName" not in object_info
-                or "description" not in object_info
-            ):
-                logger.error(
-                    "No object info for ({}, {}) of {} available!",
-                    object_type,
-                    object_instance,
-                    device_address_str,
+            for object_instance in object_group.object_instances:
+                metadata = group_metadata.copy()
+                metadata["objectInstance"] = object_instance
+                object_info = self._bacnet_reader.get_object_info(
+                    device_address_str, object_type, object_instance
                 )
-                missing_metrics += 1
-                continue
-
-            # Get vendor-specific-address from object cache
-            object_name = object_info.get("3000", object_info["objectName"])
-
-            object_name = self._object_name_vendor_specific_mapping.get(
-                object_name, object_name
-            )
+                if (
+                    object_info is None
+                    or "objectName" not in object_info
+                    or "description" not in object_info
+                ):
+                    logger.error(
+                        "No object info for ({}, {}) of {} available!",
+                        object_type,
+                        object_instance,
+                        device_address_str,
+                    )
+                    missing_metrics += 1
+                    continue
 
-            object_name = substitute_all(
-                object_name, self._object_name_vendor_specific_substitutions
-            )
+                # Get vendor-specific-address from object cache
+                object_name = self._normalize_name(
+                    object_info.get("3000", object_info["objectName"])
+                )
 
-            metric_id = (
-                Template(object_group["metric_id"])
-                .safe_substitute({"objectName": object_name, "deviceName": device_name})
-                .replace("'", ".")
-                .replace("`", ".")
-                .replace("´", ".")
-                .replace(" ", "")
-            )
-            if "description" in object_group:
-                description = (
-                    Template(object_group["description"])
-                    .safe_substitute(
+                metric_id = render_metric_id(
+                    object_group.metric_id, object_name, device_name
+                )
+                # the default description is just the object description
+                if object_group.description == "$objectDescription":
+                    description = object_info["description"]
+                else:
+                    description = _template(object_group.description).safe_substitute(
                         {
                             "objectName": object_name,
                             "objectDescription": object_info["description"],
@@ -449,17 +560,19 @@ class BacnetSource(Source):
                             "deviceDescription": device_info["description"],
                         }
                     )
-                    .replace("'", ".")
-                    .replace("`", ".")
-                    .replace("´", ".")
-                )
-                metadata["description"] = substitute_all(
-                    description, self._object_description_vendor_specific_substitutions
+                description = description.translate(_DESCRIPTION_TRANSLATION)
+                metadata["description"] = self._substitute_object_description(
+                    description
                 )
-            if "units" in object_info:
-                metadata["unit"] = object_info["units"]
+                if "units" in object_info:
+                    metadata["unit"] = object_info["units"]
 
-            metrics[metric_id] = metadata
+                metrics[metric_id] = metadata
+                if object_group.nan_at_timeout:
+                    nan_at_timeout_metrics.append(metric_id)
+                self._metric_ids.setdefault(device_address_str, {})[
+                    object_info["objectName"]
+                ] = metric_id
 
         try:
             await self.declare_metrics(metrics)
@@ -468,33 +581,40 @@ class BacnetSource(Source):
             self._worker_tasks_count_failed += 1
             return
 
-        segmentationSupport = "unknown"
-        device_address = Address(device_address_str)
-        device_info = self._bacnet_reader.deviceInfoCache.get_device_info(
-            device_address
+        segmentationSupport = self._bacnet_reader.get_segmentation_support_for_ip(
+            device_address_str
         )
-        if device_info:
-            segmentationSupport = device_info.segmentationSupported
+        if segmentationSupport is None:
+            segmentationSupport = "unknown"
 
         start_duration = Timestamp.now() - start_time
 
         logger.info(
-            f"Started BACnetSource worker task for device {device_address_str}! Took {start_duration.s - random_wait_time:.2f} s (waited {random_wait_time:.2f} s), {missing_metrics} metrics have no object info"
+            f"Started BACnetSource worker task for device {device_address_str}! Took {start_duration.s - start_delay:.2f} s (waited {start_delay:.2f} s), {missing_metrics} metrics have no object info"
         )
 
+        # a NaN is sent for metrics without values for 6 intervals, 5 intervals after the last value
+        nan_timeout = Timedelta.from_s(6 * interval)
+        nan_offset = Timedelta.from_s(5 * interval)
+
         self._worker_tasks_count_running += 1
-        deadline = Timestamp.now()
+        # schedule on the monotonic clock of the event loop, it is not affected by clock jumps
+        loop_time = self.event_loop.time
+        deadline = loop_time()
         while True:
             self._bacnet_reader.request_values(
                 device_address_str, objects, chunk_size=chunk_size
             )
 
-            if object_group.get("nan_at_timeout"):
-                for metric_id in metrics:
-                    now = Timestamp.now()
-                    last_timestamp = self._last_time_send_by_metric.get(metric_id, now)
-                    if now - last_timestamp >= Timedelta.from_s(6 * interval):
-                        timestamp_nan = last_timestamp + Timedelta.from_s(5 * interval)
+            if nan_at_timeout_metrics:
+                now = Timestamp.now()
+                for metric_id in nan_at_timeout_metrics:
+                    last_timestamp = self._last_time_send_by_metric.get(metric_id)
+                    # no timeout before the first value
+                    if last_timestamp is None:
+                        continue
+                    if now - last_timestamp >= nan_timeout:
+                        timestamp_nan = last_timestamp + nan_offset
                         await self.send(metric_id, timestamp_nan, float("nan"))
                         self._last_time_send_by_metric[metric_id] = timestamp_nan
 
@@ -503,30 +623,26 @@ class BacnetSource(Source):
                             metric_id,
                             device_address_str,
                         )
-            try:
-                deadline += Timedelta.from_s(interval)
-                now = Timestamp.now()
-                while now >= deadline:
-                    logger.warn(
-                        "Missed deadline {}, it is now {}. Device: {}, {}, chunk size: {}",
-                        deadline,
-                        now,
-                        device_address_str,
-                        segmentationSupport,
-                        chunk_size,
-                    )
-                    deadline += Timedelta.from_s(interval)
-
-                timeout = (deadline - now).s
-                await asyncio.wait_for(
-                    asyncio.shield(worker_task_stop_future), timeout=timeout
+            deadline += interval
+            now = loop_time()
+            while now >= deadline:
+                logger.warn(
+                    "Missed deadline by {:.3f} s. Device: {}, {}, chunk size: {}",
+                    now - deadline,
+                    device_address_str,
+                    segmentationSupport,
+                    chunk_size,
                 )
+                deadline += interval
+
+            # waiting doesn't cancel the stop future on timeout, so no shield needed
+            done, _ = await asyncio.wait(
+                {worker_task_stop_future}, timeout=deadline - now
+            )
+            if worker_task_stop_future in done:
                 worker_task_stop_future.result()
                 logger.info("stopping BACnetSource worker task")
                 break
-            except asyncio.TimeoutError:
-                # This is the normal case, just continue with the loop
-                continue
 
     @rpc_handler("source_bacnet.get_advertised_devices")
     async def _on_get_advertised_devices(self, **kwargs):
@@ -562,53 +678,52 @@ class BacnetSource(Source):
 
     @rpc_handler("source_bacnet.get_object_list_with_info")
     async def _on_get_object_list_with_info(self, ip, **kwargs):
-        device_properties = await self.event_loop.run_in_executor(
-            None,
-            functools.partial(
-                self._bacnet_reader.request_device_properties,
-                device_address_str=ip,
-                properties=["objectList"],
-            ),
+        device_properties = await self._bacnet_reader.request_device_properties(
+            device_address_str=ip, properties=["objectList"]
         )
         if device_properties and "objectList" in device_properties:
             object_instance_list = device_properties["objectList"]
+            object_type_filter = self._object_type_filter
+            objects = [
+                object_identifier
+                for object_identifier in object_instance_list
+                if object_identifier[0] in object_type_filter
+            ]
+            logger.debug(
+                "Ignoring {} objects not matching the object type filter",
+                len(object_instance_list) - len(objects),
+            )
+
+            required_properties = frozenset(("objectName", "description"))
+            get_object_info = self._bacnet_reader.get_object_info
             objects_not_in_cache = []
             object_info_list_from_cache = {}
-            for object_identifier in object_instance_list:
+            for object_identifier in objects:
                 object_type, object_instance = object_identifier
-                if object_type not in self._object_type_filter:
-                    logger.debug(f"Ignoring object type: {object_type}")
-                    continue
-
-                object_info_from_cache = self._bacnet_reader.get_object_info(
+                object_info_from_cache = get_object_info(
                     device_address_str=ip,
                     object_type=object_type,
                     object_instance=object_instance,
                 )
                 if (
-                    object_info_from_cache is None
-                    or "objectName" not in object_info_from_cache
-                    or "description" not in object_info_from_cache
+                    object_info_from_cache is not None
+                    and object_info_from_cache.keys() >= required_properties
                 ):
-                    objects_not_in_cache.append(object_identifier)
-                else:
                     object_info_list_from_cache[
                         object_identifier
                     ] = object_info_from_cache
+                else:
+                    objects_not_in_cache.append(object_identifier)
 
-            logger.debug(f"Objects missing in cache: {len(objects_not_in_cache)}")
-            object_info_list = await self.event_loop.run_in_executor(
-                None,
-                functools.partial(
-                    self._bacnet_reader.request_object_properties,
+            logger.debug("Objects missing in cache: {}", len(objects_not_in_cache))
+            if objects_not_in_cache:
+                object_info_list = await self._bacnet_reader.request_object_properties(
                     device_address_str=ip,
                     objects=objects_not_in_cache,
                     properties=["objectName", "description"],
-                ),
-            )
-
-            if object_info_list:
-                object_info_list_from_cache.update(object_info_list)
+                )
+                if object_info_list:
+                    object_info_list_from_cache.update(object_info_list)
 
             if object_info_list_from_cache:
                 return {
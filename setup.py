@@ -4,7 +4,7 @@ setup(
     name="metricq_source_bacnet",
     version="0.1",
     author="TU Dresden",
-    python_requires=">=3.6",
+    python_requires=">=3.7",
     packages=find_packages(),
     scripts=[],
     entry_points="""
@@ -19,5 +19,9 @@ setup(
         "metricq~=3.0",
         "bacpypes~=0.18.0",
     ],
-    extras_require={"journallogger": ["systemd"]},
+    extras_require={
+        "journallogger": ["systemd"],
+        "orjson": ["orjson"],
+        "uvloop": ["uvloop"],
+    },
 )